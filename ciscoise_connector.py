@@ -15,7 +15,20 @@
 #
 #
 # Phantom imports
+import fcntl
+import hashlib
 import json
+import os
+import socket
+import ssl
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlparse
+from xml.parsers.expat import ExpatError
 
 import phantom.app as phantom
 import requests
@@ -34,9 +47,11 @@ class CiscoISEConnector(BaseConnector):
     ACTION_ID_LIST_SESSIONS = "list_sessions"
     ACTION_ID_TERMINATE_SESSION = "terminate_session"
     ACTION_ID_LOGOFF_SYSTEM = "logoff_system"
+    ACTION_ID_LIST_AUTHENTICATIONS = "list_authentications"
     ACTION_ID_LIST_ENDPOINTS = "list_endpoints"
     ACTION_ID_GET_ENDPOINT = "get_endpoint"
     ACTION_ID_UPDATE_ENDPOINT = "update_endpoint"
+    ACTION_ID_BULK_UPDATE_ENDPOINTS = "bulk_update_endpoints"
     ACTION_ID_LIST_RESOURCES = "list_resources"
     ACTION_ID_GET_RESOURCES = "get_resources"
     ACTION_ID_DELETE_RESOURCE = "delete_resource"
@@ -57,6 +72,18 @@ class CiscoISEConnector(BaseConnector):
         self._auth = None
         self._ha_device = None
         self._ers_auth = None
+        self._throttle_lock = threading.Lock()
+        self._throttle_interval = 0
+        self._next_request_time = 0
+        self._ers_cache = dict()
+        self._ers_cache_lock = threading.Lock()
+        self._single_flight_ttl = 0
+        self._single_flight_purged = False
+        self._governor_limits = dict()
+        self._governor_rate = 0
+        self._governor_lock = threading.Lock()
+        self._queue_wait = 0
+        self._prefer_ha_device = None
 
     def initialize(self):
 
@@ -69,6 +96,25 @@ class CiscoISEConnector(BaseConnector):
             self._ers_auth = HTTPBasicAuth(config.get("ers_user"), config.get("ers_password"))
         self._base_url = "https://{0}".format(config[phantom.APP_JSON_DEVICE])
 
+        ret_val, self._single_flight_ttl = self._validate_integers(
+            self, config.get("single_flight_ttl", DEFAULT_SINGLE_FLIGHT_TTL), "single_flight_ttl", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        for api, config_key in (("ers", "ers_max_concurrency"), ("mnt", "mnt_max_concurrency")):
+            ret_val, self._governor_limits[api] = self._validate_integers(
+                self, config.get(config_key, DEFAULT_MAX_CONCURRENCY), config_key, allow_zero=True
+            )
+            if phantom.is_fail(ret_val):
+                return self.get_status()
+
+        ret_val, self._governor_rate = self._validate_integers(
+            self, config.get("node_max_requests_per_second", 0), "node_max_requests_per_second", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
         if self._ha_device:
             self._ha_device_url = "https://{0}".format(self._ha_device)
             self._call_ers_api = self._ha_device_wrapper(self._call_ers_api)
@@ -87,11 +133,11 @@ class CiscoISEConnector(BaseConnector):
         if parameter is not None:
             try:
                 if not float(parameter).is_integer():
-                    return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_PARAM.format(key)), None
+                    return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_PARAM.format(param=key)), None
                 parameter = int(parameter)
 
             except Exception:
-                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_PARAM.format(key)), None
+                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_PARAM.format(param=key)), None
 
             if parameter < 0:
                 return action_result.set_status(phantom.APP_ERROR,
@@ -102,21 +148,476 @@ class CiscoISEConnector(BaseConnector):
 
         return phantom.APP_SUCCESS, parameter
 
+    def _normalize_mac(self, mac_address):
+        """ This method converts a MAC address to the upper case, colon separated notation used by ISE.
+        :param mac_address: MAC address in colon, dash, dot or bare hex notation
+        :return: normalized MAC address, or the upper cased input if it is not a MAC address
+        """
+
+        mac_address = mac_address.strip()
+        digits = "".join(ch for ch in mac_address if ch not in ":-.")
+        try:
+            int(digits, 16)
+        except ValueError:
+            return mac_address.upper()
+
+        if len(digits) != 12:
+            return mac_address.upper()
+
+        return ":".join(digits[i:i + 2] for i in range(0, 12, 2)).upper()
+
+    def _split_list_param(self, value):
+        """ This method splits a comma separated action parameter into a list of unique, non-empty values.
+        :param value: comma separated string or None
+        :return: list of values in input order
+        """
+
+        if not value:
+            return []
+
+        return list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+
+    def _compact_record(self, record, fields=None, compact=False):
+        """ This method reduces an ERS record to what playbooks need.
+        :param record: ERS resource dictionary
+        :param fields: list of top level fields to keep, all fields are kept if empty
+        :param compact: whether to drop the link metadata (href/rel/type) at any depth
+        :return: reduced copy of the record
+        """
+
+        if not isinstance(record, dict):
+            return record
+
+        if fields:
+            record = {field: record[field] for field in fields if field in record}
+
+        if not compact:
+            return dict(record)
+
+        def strip_links(value):
+            if isinstance(value, dict):
+                return {key: strip_links(item) for key, item in value.items() if key != "link"}
+            if isinstance(value, list):
+                return [strip_links(item) for item in value]
+            return value
+
+        return strip_links(record)
+
+    def _set_rate_limit(self, requests_per_second):
+        """ This method sets the maximum number of requests per second issued through _throttle.
+        :param requests_per_second: maximum requests per second, 0 or None disables the limit
+        """
+
+        self._throttle_interval = 1.0 / requests_per_second if requests_per_second else 0
+        self._next_request_time = 0
+
+    def _throttle(self):
+        """ This method blocks the calling thread until it is allowed to issue its next request. """
+
+        if not self._throttle_interval:
+            return
+
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self._throttle_interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def _read_single_flight_result(self, result_path):
+
+        try:
+            with open(result_path) as result_file:
+                result = json.load(result_file)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - result["time"] > self._single_flight_ttl:
+            return None
+
+        return result["status_code"], result["text"]
+
+    def _write_single_flight_result(self, result_path, status_code, text):
+
+        temp_path = "{0}.{1}.tmp".format(result_path, os.getpid())
+        try:
+            with open(temp_path, "w") as result_file:
+                json.dump({"time": time.time(), "status_code": status_code, "text": text}, result_file)
+            os.replace(temp_path, result_path)
+        except OSError as e:
+            self.debug_print("Unable to store the shared result: {}".format(e))
+
+    def _single_flight_generation(self, directory):
+
+        try:
+            with open(os.path.join(directory, SINGLE_FLIGHT_GENERATION_FILE)) as generation_file:
+                return generation_file.read()
+        except OSError:
+            return ""
+
+    def _invalidate_single_flight_results(self):
+        """ This method makes the results shared on this asset unusable, it is called after every request
+        that may change data on the server. Results are keyed on a generation which is replaced here,
+        so results stored by requests still in flight are never read either.
+        """
+
+        if not self._single_flight_ttl:
+            return
+
+        directory = os.path.join(self.get_state_dir(), SINGLE_FLIGHT_DIR, str(self.get_asset_id()))
+        generation_path = os.path.join(directory, SINGLE_FLIGHT_GENERATION_FILE)
+        temp_path = "{0}.{1}.{2}.tmp".format(generation_path, os.getpid(), threading.get_ident())
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(temp_path, "w") as generation_file:
+                generation_file.write(os.urandom(16).hex())
+            os.replace(temp_path, generation_path)
+        except OSError as e:
+            self.debug_print("Unable to invalidate the shared results: {}".format(e))
+
+    def _lock_single_flight_key(self, lock_path):
+        """ This method takes the exclusive lock of a single flight key.
+        :param lock_path: path of the lock file of the key
+        :return: open lock file, the caller must close it to release the lock
+        """
+
+        while True:
+            lock_file = open(lock_path, "a")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # A purge may have removed the lock file while we were waiting for it, the lock is then on a stale file
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+    def _purge_single_flight_results(self, directory):
+        """ This method removes the expired results along with their lock files, once per action.
+        Keys with a request in flight are skipped.
+        :param directory: single flight directory
+        """
+
+        if self._single_flight_purged:
+            return
+        self._single_flight_purged = True
+
+        max_age = max(SINGLE_FLIGHT_PURGE_AGE, self._single_flight_ttl)
+        now = time.time()
+
+        try:
+            file_names = os.listdir(directory)
+        except OSError as e:
+            self.debug_print("Unable to purge the shared results: {}".format(e))
+            return
+
+        for file_name in file_names:
+            file_path = os.path.join(directory, file_name)
+            key, extension = os.path.splitext(file_name)
+
+            try:
+                # Left behind by processes that died while storing a result
+                if extension == ".tmp":
+                    if now - os.path.getmtime(file_path) > max_age:
+                        os.remove(file_path)
+                    continue
+
+                if extension != ".lock":
+                    continue
+
+                result_path = os.path.join(directory, "{0}.json".format(key))
+                if os.path.exists(result_path) and now - os.path.getmtime(result_path) <= max_age:
+                    continue
+
+                with open(file_path, "a") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if os.fstat(lock_file.fileno()).st_ino != os.stat(file_path).st_ino:
+                        continue
+                    if os.path.exists(result_path):
+                        os.remove(result_path)
+                    os.remove(file_path)
+            except OSError:
+                continue
+
+    def _single_flight(self, request_key, fetch):
+        """ This method makes sure identical GET requests issued concurrently by all actions on this asset
+        reach the server only once. Callers arriving while a request is in flight wait for it and reuse its
+        result, which stays shared for single_flight_ttl seconds.
+        :param request_key: string identifying the request, usually the URL
+        :param fetch: function making the request and returning a tuple of status code and response text
+        :return: status code, response text
+        """
+
+        if not self._single_flight_ttl:
+            return fetch()
+
+        config = self.get_config()
+        directory = os.path.join(self.get_state_dir(), SINGLE_FLIGHT_DIR, str(self.get_asset_id()))
+        key = hashlib.sha256(
+            "{0}|{1}|{2}".format(self._single_flight_generation(directory), config[phantom.APP_JSON_USERNAME], request_key).encode("utf-8")
+        ).hexdigest()
+
+        result_path = os.path.join(directory, "{0}.json".format(key))
+
+        result = self._read_single_flight_result(result_path)
+        if result is not None:
+            return result
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._purge_single_flight_results(directory)
+            lock_file = self._lock_single_flight_key(os.path.join(directory, "{0}.lock".format(key)))
+        except OSError as e:
+            self.debug_print("Unable to open the single flight lock: {}".format(e))
+            return fetch()
+
+        # The lock is held from _lock_single_flight_key until the lock file is closed
+        with lock_file:
+            result = self._read_single_flight_result(result_path)
+            if result is not None:
+                return result
+
+            status_code, text = fetch()
+            if status_code == 200:
+                self._write_single_flight_result(result_path, status_code, text)
+
+            return status_code, text
+
+    def _take_governor_token(self, directory):
+        """ This method takes a token from the token bucket of a node, sleeping until one is available.
+        The caller must hold the bucket lock of the node.
+        :param directory: governor directory of the node
+        """
+
+        bucket_path = os.path.join(directory, "bucket.json")
+        now = time.time()
+
+        try:
+            with open(bucket_path) as bucket_file:
+                bucket = json.load(bucket_file)
+        except (OSError, ValueError):
+            bucket = {"tokens": self._governor_rate, "time": now}
+
+        tokens = min(self._governor_rate, bucket["tokens"] + (now - bucket["time"]) * self._governor_rate)
+
+        if tokens < 1:
+            time.sleep((1 - tokens) / self._governor_rate)
+            now = time.time()
+            tokens = 1
+
+        with open(bucket_path, "w") as bucket_file:
+            json.dump({"tokens": tokens - 1, "time": now}, bucket_file)
+
+    def _read_governor_queue(self, queue_path):
+
+        try:
+            with open(queue_path) as queue_file:
+                return json.load(queue_file)
+        except (OSError, ValueError):
+            return {"next": 0, "serving": 0}
+
+    def _write_governor_queue(self, queue_path, queue):
+
+        temp_path = "{0}.{1}.{2}.tmp".format(queue_path, os.getpid(), threading.get_ident())
+        with open(temp_path, "w") as queue_file:
+            json.dump(queue, queue_file)
+        os.replace(temp_path, queue_path)
+
+    def _governor_ticket_held(self, directory, ticket):
+        """ This method checks whether the holder of a ticket is still waiting for its slot.
+        The ticket file of a holder that is gone is removed.
+        :param directory: governor directory of the node API
+        :param ticket: ticket number
+        :return: whether the ticket is held
+        """
+
+        ticket_path = os.path.join(directory, "ticket_{0}.lock".format(ticket))
+        if not os.path.exists(ticket_path):
+            return False
+
+        with open(ticket_path, "a") as ticket_file:
+            try:
+                fcntl.flock(ticket_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            try:
+                os.remove(ticket_path)
+            except FileNotFoundError:
+                pass
+
+        return False
+
+    def _take_governor_slot(self, directory, limit):
+        """ This method waits for a free concurrency slot of a node API. Waiters are served in arrival order:
+        each one takes a ticket, and only the holder of the ticket being served polls for a free slot.
+        Holders keep their ticket file locked while they wait, so tickets of processes that are gone are skipped.
+        :param directory: governor directory of the node API
+        :param limit: number of slots
+        :return: open slot lock file, closing it frees the slot
+        """
+
+        queue_lock_path = os.path.join(directory, "queue.lock")
+        queue_path = os.path.join(directory, "queue.json")
+
+        with open(queue_lock_path, "a") as queue_lock_file:
+            fcntl.flock(queue_lock_file, fcntl.LOCK_EX)
+            queue = self._read_governor_queue(queue_path)
+            ticket = queue["next"]
+            ticket_path = os.path.join(directory, "ticket_{0}.lock".format(ticket))
+            ticket_file = open(ticket_path, "a")
+            try:
+                fcntl.flock(ticket_file, fcntl.LOCK_EX)
+                queue["next"] = ticket + 1
+                self._write_governor_queue(queue_path, queue)
+            except OSError:
+                ticket_file.close()
+                raise
+
+        try:
+            while True:
+                with open(queue_lock_path, "a") as queue_lock_file:
+                    fcntl.flock(queue_lock_file, fcntl.LOCK_EX)
+                    queue = self._read_governor_queue(queue_path)
+
+                    if queue["serving"] >= ticket:
+                        slot_file = self._try_governor_slots(directory, limit)
+                        if slot_file is not None:
+                            try:
+                                queue["serving"] = max(queue["serving"], ticket + 1)
+                                self._write_governor_queue(queue_path, queue)
+                            except OSError:
+                                slot_file.close()
+                                raise
+                            return slot_file
+                    elif not self._governor_ticket_held(directory, queue["serving"]):
+                        queue["serving"] += 1
+                        self._write_governor_queue(queue_path, queue)
+                        continue
+
+                time.sleep(GOVERNOR_POLL_INTERVAL)
+        finally:
+            try:
+                os.remove(ticket_path)
+            except OSError:
+                pass
+            ticket_file.close()
+
+    def _try_governor_slots(self, directory, limit):
+        """ This method takes a free concurrency slot of a node API without waiting.
+        :param directory: governor directory of the node API
+        :param limit: number of slots
+        :return: open slot lock file, or None if all slots are taken
+        """
+
+        for index in range(limit):
+            slot_file = open(os.path.join(directory, "slot_{0}.lock".format(index)), "a")
+            try:
+                fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                slot_file.close()
+                continue
+            return slot_file
+
+        return None
+
+    @contextmanager
+    def _governor_slot(self, url, api):
+        """ This method caps the requests in flight to a node across all actions running on this asset,
+        and the rate at which they are made. Concurrency is limited per API, while the ERS and MnT APIs
+        of a node share one rate limiting bucket. Slots are granted in arrival order.
+        The time spent waiting is added to the queue wait.
+        :param url: URL of the request
+        :param api: API the request is made to, either 'ers' or 'mnt'
+        """
+
+        limit = self._governor_limits.get(api)
+        if not (limit or self._governor_rate):
+            yield
+            return
+
+        start_time = time.monotonic()
+        slot_file = None
+
+        try:
+            key = hashlib.sha256("{0}|{1}".format(self.get_asset_id(), urlparse(url).hostname).encode("utf-8")).hexdigest()
+            directory = os.path.join(self.get_state_dir(), GOVERNOR_DIR, key)
+            api_directory = os.path.join(directory, api)
+            os.makedirs(api_directory, exist_ok=True)
+
+            if limit:
+                slot_file = self._take_governor_slot(api_directory, limit)
+
+            if self._governor_rate:
+                with open(os.path.join(directory, "bucket.lock"), "a") as bucket_lock_file:
+                    fcntl.flock(bucket_lock_file, fcntl.LOCK_EX)
+                    try:
+                        self._take_governor_token(directory)
+                    finally:
+                        fcntl.flock(bucket_lock_file, fcntl.LOCK_UN)
+        except OSError as e:
+            # An unusable state directory must not fail the request, it is then made without the limits
+            self.debug_print("Unable to apply the request limits: {}".format(e))
+
+        with self._governor_lock:
+            self._queue_wait += time.monotonic() - start_time
+
+        try:
+            yield
+        finally:
+            if slot_file is not None:
+                fcntl.flock(slot_file, fcntl.LOCK_UN)
+                slot_file.close()
+
+    def _node_health_path(self):
+
+        return os.path.join(self.get_state_dir(), "{0}_{1}".format(self.get_asset_id(), NODE_HEALTH_FILE))
+
+    def _should_prefer_ha_device(self):
+        """ This method checks the node health measured by the last test connectivity run.
+        The secondary device is preferred while that run found the primary unhealthy and the secondary healthy.
+        :return: whether calls should be made to the secondary device first
+        """
+
+        if self._prefer_ha_device is not None:
+            return self._prefer_ha_device
+
+        self._prefer_ha_device = False
+
+        try:
+            with open(self._node_health_path()) as health_file:
+                node_health = json.load(health_file)
+        except (OSError, ValueError):
+            return self._prefer_ha_device
+
+        if time.time() - node_health.get("time", 0) > NODE_HEALTH_MAX_AGE:
+            return self._prefer_ha_device
+
+        nodes = node_health.get("nodes", {})
+        primary_healthy = nodes.get(self._base_url, {}).get("healthy", True)
+        secondary_healthy = nodes.get(self._ha_device_url, {}).get("healthy", False)
+        self._prefer_ha_device = not primary_healthy and secondary_healthy
+
+        return self._prefer_ha_device
+
     def _ha_device_wrapper(self, func):
         def make_another_call(*args, **kwargs):
-            self.debug_print("Making call to primary device")
-            ret_val, ret_data = func(*args, **kwargs)
+            prefer_ha_device = self._should_prefer_ha_device()
+            self.debug_print("Making call to {} device".format("secondary" if prefer_ha_device else "primary"))
+            ret_val, ret_data = func(try_ha_device=prefer_ha_device, *args, **kwargs)
 
             if phantom.is_fail(ret_val) and self._ha_device:
                 self.debug_print("Call to first device failed. Data returned: {}".format(ret_data))
-                self.debug_print("Making call to secondary device")
-                ret_val, ret_data = func(try_ha_device=True, *args, **kwargs)
+                self.debug_print("Making call to {} device".format("primary" if prefer_ha_device else "secondary"))
+                ret_val, ret_data = func(try_ha_device=not prefer_ha_device, *args, **kwargs)
 
             return ret_val, ret_data
 
         return make_another_call
 
-    def _call_ers_api(self, endpoint, action_result, data=None, allow_unknown=True, method="get", try_ha_device=False):
+    def _call_ers_api(self, endpoint, action_result, data=None, allow_unknown=True, method="get", single_flight=True,
+                      try_ha_device=False):
         auth_method = self._ers_auth or self._auth
         if not auth_method:
             return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERS_CRED_MISSING), None
@@ -126,6 +627,19 @@ class CiscoISEConnector(BaseConnector):
 
         ret_data = None
 
+        # GET responses are cached for the lifetime of the connector, any write invalidates the cache
+        # as well as the results shared with other actions on this asset
+        cache_key = None
+        if method == "get":
+            cache_key = "{0}|{1}".format(url, json.dumps(data, sort_keys=True))
+            with self._ers_cache_lock:
+                cached_text = self._ers_cache.get(cache_key)
+            if cached_text is not None:
+                return phantom.APP_SUCCESS, json.loads(cached_text)
+        else:
+            with self._ers_cache_lock:
+                self._ers_cache.clear()
+
         config = self.get_config()
         verify = config[phantom.APP_JSON_VERIFY]
         try:
@@ -133,47 +647,93 @@ class CiscoISEConnector(BaseConnector):
         except AttributeError as e:
             self.debug_print("Exception occurred: {}".format(e))
             return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_REST_API, e), ret_data
-        try:
+
+        def fetch():
             headers = {"Content-Type": "application/json", "ACCEPT": "application/json"}
-            resp = request_func(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
-                url,
-                json=data,
-                verify=verify,
-                headers=headers,
-                auth=auth_method
-            )
+            with self._governor_slot(url, "ers"):
+                resp = request_func(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
+                    url,
+                    json=data,
+                    verify=verify,
+                    headers=headers,
+                    auth=auth_method
+                )
+            return resp.status_code, resp.text
+
+        try:
+            if cache_key and single_flight:
+                status_code, text = self._single_flight(cache_key, fetch)
+            else:
+                status_code, text = fetch()
         except Exception as e:
             self.debug_print("Exception occurred: {}".format(e))
             return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_REST_API, e), ret_data
+        finally:
+            if not cache_key:
+                self._invalidate_single_flight_results()
 
-        if not (200 <= resp.status_code < 399):
-            error_message = resp.text
-            if resp.status_code == 401:
+        if not (200 <= status_code < 399):
+            error_message = text
+            if status_code == 401:
                 error_message = "The request has not been applied because it lacks valid authentication credentials" \
                                 " for the target resource."
-            elif resp.status_code == 404:
+            elif status_code == 404:
                 error_message = "Resource not found"
             return (
                 action_result.set_status(
                     phantom.APP_ERROR,
                     CISCOISE_ERR_REST_API_ERR_CODE,
-                    code=resp.status_code,
+                    code=status_code,
                     message=error_message
                 ),
                 ret_data
             )
 
-        if not resp.text:
+        if not text:
             return (
                 action_result.set_status(phantom.APP_SUCCESS, "Empty response and no information in the header"),
                 None
             )
 
-        ret_data = json.loads(resp.text)
+        ret_data = json.loads(text)
+
+        if cache_key:
+            with self._ers_cache_lock:
+                self._ers_cache[cache_key] = text
 
         return phantom.APP_SUCCESS, ret_data
 
-    def _call_rest_api(self, endpoint, action_result, schema=None, data=None, allow_unknown=True, try_ha_device=False):
+    def _run_concurrently(self, func, keys, action_result, max_workers=DEFAULT_MAX_WORKERS):
+        """ This method calls func(key, action_result) once for every unique key on a thread pool.
+        Every call gets its own ActionResult, the first failure is copied to action_result.
+        :param func: function returning a tuple of status (success/failure) and data
+        :param keys: iterable of hashable keys, repeated keys are only processed once
+        :param action_result: object of ActionResult class
+        :param max_workers: maximum number of concurrent calls
+        :return: status (success/failure), dictionary of key to the data returned by func
+        """
+
+        keys = list(dict.fromkeys(keys))
+        key_results = {key: ActionResult() for key in keys}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(func, key, key_results[key]) for key in keys}
+
+        ret_data = dict()
+        for key in keys:
+            try:
+                ret_val, ret_data[key] = futures[key].result()
+            except Exception as e:
+                self.debug_print("Exception occurred: {}".format(e))
+                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_REST_API, e), None
+
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(phantom.APP_ERROR, key_results[key].get_message()), None
+
+        return phantom.APP_SUCCESS, ret_data
+
+    def _call_rest_api(self, endpoint, action_result, schema=None, data=None, allow_unknown=True, single_flight=False,
+                       item_callback=None, item_reset=None, try_ha_device=False):
         url = "{0}{1}".format(self._base_url, endpoint)
         if try_ha_device:
             url = "{0}{1}".format(self._ha_device_url, endpoint)
@@ -183,28 +743,58 @@ class CiscoISEConnector(BaseConnector):
         config = self.get_config()
         verify = config[phantom.APP_JSON_VERIFY]
 
+        def fetch():
+            with self._governor_slot(url, "mnt"):
+                resp = requests.get(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
+                    url,
+                    verify=verify,
+                    auth=self._auth,
+                    stream=item_callback is not None)
+
+                if item_callback is None or resp.status_code != 200:
+                    return resp.status_code, resp.text
+
+                # The reply is parsed while it is read, only the items kept by item_callback stay in memory.
+                # What an earlier attempt kept, e.g. on the other device of an HA pair, is discarded first
+                if item_reset is not None:
+                    item_reset()
+                resp.raw.decode_content = True
+                xmltodict.parse(resp.raw, item_depth=2, item_callback=item_callback)
+            return resp.status_code, None
+
+        # Only read-only calls may be coalesced, CoA calls have side effects and must always reach the server
         try:
-            resp = requests.get(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
-                url,
-                verify=verify,
-                auth=self._auth)
+            if single_flight and item_callback is None:
+                status_code, text = self._single_flight(url, fetch)
+            else:
+                status_code, text = fetch()
+        except ExpatError as e:
+            self.debug_print("Exception occurred: {}".format(e))
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_UNABLE_TO_PARSE_REPLY, e), ret_data
         except Exception as e:
             self.debug_print("Exception occurred: {}".format(e))
             return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_REST_API, e), ret_data
+        finally:
+            # Calls that are neither coalesced nor streamed are CoA calls, which change the session data
+            if not single_flight and item_callback is None:
+                self._invalidate_single_flight_results()
 
-        if resp.status_code != 200:
+        if status_code != 200:
             return (
                 action_result.set_status(
                     phantom.APP_ERROR,
                     CISCOISE_ERR_REST_API_ERR_CODE,
-                    code=resp.status_code,
-                    message=resp.text,
+                    code=status_code,
+                    message=text,
                 ),
                 ret_data,
             )
 
-        action_result.add_debug_data(resp.text)
-        xml = resp.text
+        if item_callback is not None:
+            return phantom.APP_SUCCESS, ret_data
+
+        action_result.add_debug_data(text)
+        xml = text
 
         try:
             response_dict = xmltodict.parse(xml)
@@ -229,13 +819,128 @@ class CiscoISEConnector(BaseConnector):
         except Exception as ex:  # noqa: F841
             return action_result.set_status(phantom.APP_ERROR, "Invalid resource type")
 
+    def _lookup_session_group_values(self, mac_address, action_result, fields):
+        """ This method looks up the values of the group-by fields which are not part of the active session list.
+        Failed lookups are reported as 'Unknown' instead of failing the aggregation.
+        :param mac_address: MAC address of the session
+        :param action_result: object of ActionResult class
+        :param fields: list of group-by fields to look up
+        :return: status success, dictionary of field to value
+        """
+
+        if not mac_address:
+            return phantom.APP_SUCCESS, {field: "Unknown" for field in fields}
+
+        values = dict()
+
+        if CISCOISE_JSON_IS_QUARANTINED in fields:
+            is_quarantined_rest = "{0}/{1}".format(IS_MAC_QUARANTINED_REST, mac_address)
+            ret_val, ret_data = self._call_rest_api(
+                is_quarantined_rest, action_result, IS_MAC_QUARAN_RESP_SCHEMA, single_flight=True
+            )
+            values[CISCOISE_JSON_IS_QUARANTINED] = "Unknown"
+            if phantom.is_success(ret_val):
+                values[CISCOISE_JSON_IS_QUARANTINED] = "Yes" if ret_data["EPS_RESULT"]["userData"] == "true" else "No"
+
+        detail_fields = [field for field in fields if field in SESSION_DETAIL_GROUP_FIELDS]
+
+        if detail_fields:
+            endpoint = "{0}/{1}".format(MAC_SESSION_DETAILS_REST, mac_address)
+            ret_val, ret_data = self._call_rest_api(endpoint, action_result, single_flight=True)
+            session_parameters = dict()
+            if phantom.is_success(ret_val):
+                session_parameters = (ret_data or {}).get("sessionParameters") or {}
+            for field in detail_fields:
+                values[field] = session_parameters.get(field) or "Unknown"
+
+        return phantom.APP_SUCCESS, values
+
+    def _aggregate_sessions(self, action_result, aggregate_by):
+        """ This method counts the active sessions per value of each group-by field while streaming the active list.
+        :param action_result: object of ActionResult class
+        :param aggregate_by: list of group-by fields
+        :return: status (success/failure), number of sessions, dictionary of field to Counter of values
+        """
+
+        counts = {field: Counter() for field in aggregate_by}
+        lookup_fields = [
+            field for field in aggregate_by if field == CISCOISE_JSON_IS_QUARANTINED or field in SESSION_DETAIL_GROUP_FIELDS
+        ]
+        session_macs = Counter()
+        total = 0
+
+        def reset():
+            nonlocal total
+            for counter in counts.values():
+                counter.clear()
+            session_macs.clear()
+            total = 0
+
+        def count(path, session):
+            nonlocal total
+
+            if not isinstance(session, dict):
+                return True
+
+            total += 1
+            mac_address = session.get("calling_station_id") or ""
+
+            for field in aggregate_by:
+                if field == "mac_oui":
+                    normalized_mac = self._normalize_mac(mac_address)
+                    counts[field][normalized_mac[:8] if phantom.is_mac(normalized_mac) else "Unknown"] += 1
+                elif field not in lookup_fields:
+                    counts[field][session.get(field) or "Unknown"] += 1
+
+            if lookup_fields:
+                session_macs[mac_address] += 1
+
+            return True
+
+        ret_val, _ = self._call_rest_api(ACTIVE_LIST_REST, action_result, item_callback=count, item_reset=reset)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None, None
+
+        if lookup_fields:
+            ret_val, mac_values = self._run_concurrently(
+                lambda mac_address, mac_result: self._lookup_session_group_values(mac_address, mac_result, lookup_fields),
+                session_macs,
+                action_result
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None, None
+
+            for mac_address, sessions in session_macs.items():
+                for field in lookup_fields:
+                    counts[field][mac_values[mac_address][field]] += sessions
+
+        return phantom.APP_SUCCESS, total, counts
+
     def _list_sessions(self, param):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
         summary = action_result.update_summary({CISCOISE_JSON_TOTAL_SESSIONS: 0})
 
-        ret_val, ret_data = self._call_rest_api(ACTIVE_LIST_REST, action_result)
+        aggregate_by = self._split_list_param(param.get("aggregate_by"))
+
+        if aggregate_by:
+            ret_val, total, counts = self._aggregate_sessions(action_result, aggregate_by)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            for field in aggregate_by:
+                for value, sessions in counts[field].most_common():
+                    action_result.add_data({"group_by": field, "value": value, "count": sessions})
+
+            summary.update({CISCOISE_JSON_TOTAL_SESSIONS: total, "groups": action_result.get_data_size()})
+
+            return action_result.set_status(phantom.APP_SUCCESS)
+
+        ret_val, ret_data = self._call_rest_api(ACTIVE_LIST_REST, action_result, single_flight=True)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
@@ -264,7 +969,9 @@ class CiscoISEConnector(BaseConnector):
             # Get the quarantined state of the mac address
             is_quarantined_rest = "{0}/{1}".format(IS_MAC_QUARANTINED_REST, session["calling_station_id"])
 
-            ret_val, ret_data = self._call_rest_api(is_quarantined_rest, action_result, IS_MAC_QUARAN_RESP_SCHEMA)
+            ret_val, ret_data = self._call_rest_api(
+                is_quarantined_rest, action_result, IS_MAC_QUARAN_RESP_SCHEMA, single_flight=True
+            )
 
             if phantom.is_fail(ret_val):
                 continue
@@ -281,22 +988,56 @@ class CiscoISEConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        endpoint = ERS_ENDPOINT_REST
+        mac_filter = self._split_list_param(param.get("mac_address"))
+        fields = self._split_list_param(param.get("fields"))
+        compact = param.get("compact", False)
 
-        mac_filter = param.get("mac_address")
-        if mac_filter is not None:
-            endpoint = ERS_ENDPOINT_REST + "?filter=mac.EQ." + mac_filter
+        # Projected or compact results are flattened into one record per endpoint
+        flatten = compact or fields
 
-        ret_val, ret_data = self._call_ers_api(endpoint, action_result)
+        if not mac_filter:
+            ret_val, ret_data = self._call_ers_api(ERS_ENDPOINT_REST, action_result)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            total = ret_data["SearchResult"]["total"]
+
+            action_result.update_summary({"endpoints_found": total})
+
+            if flatten:
+                for resource in ret_data["SearchResult"].get("resources", []):
+                    action_result.add_data(self._compact_record(resource, fields, compact))
+            else:
+                action_result.add_data(ret_data)
+
+            return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_LIST_ENDPOINTS.format(total))
+
+        # Different notations of the same MAC address are looked up and reported once, under the first one given
+        normalized_macs = dict()
+        for mac_address in mac_filter:
+            normalized_macs.setdefault(self._normalize_mac(mac_address), mac_address)
+
+        ret_val, found = self._search_endpoints_by_mac(normalized_macs, action_result)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        total = ret_data["SearchResult"]["total"]
+        total = 0
+        for normalized_mac, mac_address in normalized_macs.items():
+            resources = found[normalized_mac]
+            total += len(resources)
 
-        action_result.update_summary({"endpoints_found": total})
+            if not flatten:
+                action_result.add_data({"mac_address": mac_address, "SearchResult": {"total": len(resources), "resources": resources}})
+                continue
 
-        action_result.add_data(ret_data)
+            for resource in resources:
+                record = self._compact_record(resource, fields, compact)
+                record["mac_address"] = mac_address
+                action_result.add_data(record)
+
+        action_result.update_summary({"endpoints_found": total})
 
         return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_LIST_ENDPOINTS.format(total))
 
@@ -352,6 +1093,213 @@ class CiscoISEConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, "Endpoint Updated")
 
+    def _build_endpoint_payload(self, attributes=None, custom_attributes=None):
+
+        final_data = {"ERSEndPoint": dict(attributes or {})}
+
+        if custom_attributes:
+            final_data["ERSEndPoint"]["customAttributes"] = {"customAttributes": dict(custom_attributes)}
+
+        return final_data
+
+    def _search_endpoints_by_mac(self, mac_addresses, action_result):
+        """ This method finds the ISE endpoints of MAC addresses using concurrent OR-filtered ERS queries.
+        :param mac_addresses: iterable of normalized MAC addresses
+        :param action_result: object of ActionResult class
+        :return: status (success/failure), dictionary of MAC address to list of matching endpoint resources
+        """
+
+        found = {mac: [] for mac in mac_addresses}
+        mac_addresses = sorted(found)
+
+        batches = dict()
+        for i in range(0, len(mac_addresses), ERS_FILTER_BATCH_SIZE):
+            batch = mac_addresses[i:i + ERS_FILTER_BATCH_SIZE]
+            filters = "&".join("filter=mac.EQ.{0}".format(mac) for mac in batch)
+            batches["{0}?{1}&{2}&size={3}".format(ERS_ENDPOINT_REST, filters, ERS_FILTER_OR, ERS_MAX_PAGE_SIZE)] = batch
+
+        ret_val, responses = self._run_concurrently(self._call_ers_api, batches, action_result)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        unmatched = dict()
+        for endpoint, batch in batches.items():
+            renamed = False
+            for resource in (responses[endpoint] or {}).get("SearchResult", {}).get("resources", []):
+                name = self._normalize_mac(resource.get("name", ""))
+                if name in batch:
+                    found[name].append(resource)
+                else:
+                    renamed = True
+
+            if renamed:
+                unmatched.update(
+                    ("{0}?filter=mac.EQ.{1}".format(ERS_ENDPOINT_REST, mac), mac) for mac in batch if not found[mac]
+                )
+
+        # Endpoints whose name is not their MAC address cannot be matched from a batched search, look them up one by one
+        ret_val, responses = self._run_concurrently(self._call_ers_api, unmatched, action_result)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        for endpoint, mac in unmatched.items():
+            found[mac].extend((responses[endpoint] or {}).get("SearchResult", {}).get("resources", []))
+
+        return phantom.APP_SUCCESS, found
+
+    def _resolve_macs(self, mac_addresses, action_result):
+        """ This method resolves MAC addresses to ISE endpoint IDs.
+        :param mac_addresses: iterable of normalized MAC addresses
+        :param action_result: object of ActionResult class
+        :return: status (success/failure), dictionary of MAC address to endpoint ID
+        """
+
+        ret_val, found = self._search_endpoints_by_mac(mac_addresses, action_result)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        return phantom.APP_SUCCESS, {mac: resources[0]["id"] for mac, resources in found.items() if resources}
+
+    def _put_endpoint_update(self, endpoint_id, update):
+
+        self._throttle()
+
+        put_result = ActionResult()
+        endpoint = "{0}/{1}".format(ERS_ENDPOINT_REST, endpoint_id)
+        data = self._build_endpoint_payload(update["attributes"], update["custom_attributes"])
+
+        ret_val, _ = self._call_ers_api(endpoint, put_result, data=data, method="put")
+
+        if phantom.is_fail(ret_val):
+            return ret_val, put_result.get_message()
+
+        return ret_val, CISCOISE_SUCC_UPDATE_ENDPOINT
+
+    def _bulk_update_endpoints(self, param):
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        start_time = time.monotonic()
+
+        ret_val, max_workers = self._validate_integers(
+            action_result, param.get("max_workers", DEFAULT_MAX_WORKERS), "max_workers"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, requests_per_second = self._validate_integers(
+            action_result,
+            param.get("max_requests_per_second", DEFAULT_MAX_REQUESTS_PER_SECOND),
+            "max_requests_per_second",
+            allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        try:
+            rows = json.loads(param["endpoints_json"])
+        except Exception as ex:  # noqa: F841
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_JSON.format(param="endpoints_json"))
+
+        if not isinstance(rows, list) or not rows:
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_BULK_ROWS)
+
+        results = list()
+        pending = list()
+
+        for index, row in enumerate(rows):
+            result = {"row": index, "status": "failed"}
+            results.append(result)
+
+            if not isinstance(row, dict):
+                result["message"] = CISCOISE_ERR_BULK_ROW_INVALID
+                continue
+
+            result["endpoint_id"] = row.get("endpoint_id")
+            result["mac_address"] = row.get("mac_address")
+
+            identifiers = [value for value in (result["endpoint_id"], result["mac_address"]) if value is not None]
+            if not identifiers or not all(isinstance(value, str) and value.strip() for value in identifiers):
+                result["message"] = CISCOISE_ERR_BULK_ROW_ID
+                continue
+
+            attributes = row.get("attributes") or {}
+            custom_attributes = row.get("custom_attributes") or {}
+
+            if not isinstance(attributes, dict) or not isinstance(custom_attributes, dict) \
+                    or not (attributes or custom_attributes):
+                result["message"] = CISCOISE_ERR_BULK_ROW_ATTRIBUTES
+                continue
+
+            pending.append((result, attributes, custom_attributes))
+
+        resolved = dict()
+        macs = {self._normalize_mac(result["mac_address"]) for result, _, _ in pending if not result["endpoint_id"]}
+
+        if macs:
+            ret_val, resolved = self._resolve_macs(macs, action_result)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        # Rows targeting the same endpoint are merged into a single PUT, later rows win on conflicting keys
+        updates = dict()
+        for result, attributes, custom_attributes in pending:
+            if not result["endpoint_id"]:
+                result["endpoint_id"] = resolved.get(self._normalize_mac(result["mac_address"]))
+                if not result["endpoint_id"]:
+                    result["message"] = CISCOISE_ERR_MAC_NOT_FOUND
+                    continue
+
+            update = updates.setdefault(result["endpoint_id"], {"attributes": {}, "custom_attributes": {}, "results": []})
+            update["attributes"].update(attributes)
+            update["custom_attributes"].update(custom_attributes)
+            update["results"].append(result)
+
+        self._set_rate_limit(requests_per_second)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                endpoint_id: executor.submit(self._put_endpoint_update, endpoint_id, update)
+                for endpoint_id, update in updates.items()
+            }
+
+        endpoints_updated = 0
+        for endpoint_id, future in futures.items():
+            try:
+                ret_val, message = future.result()
+            except Exception as e:
+                self.debug_print("Exception occurred: {}".format(e))
+                ret_val, message = phantom.APP_ERROR, CISCOISE_ERR_REST_API
+
+            if phantom.is_success(ret_val):
+                endpoints_updated += 1
+
+            for result in updates[endpoint_id]["results"]:
+                result["status"] = "success" if phantom.is_success(ret_val) else "failed"
+                result["message"] = message
+                result["merged_rows"] = len(updates[endpoint_id]["results"])
+
+        for result in results:
+            action_result.add_data(result)
+
+        updated = sum(1 for result in results if result["status"] == "success")
+
+        summary = action_result.update_summary({})
+        summary["total_rows"] = len(results)
+        summary["rows_updated"] = updated
+        summary["rows_failed"] = len(results) - updated
+        summary["endpoints_updated"] = endpoints_updated
+        summary["elapsed_seconds"] = round(time.monotonic() - start_time, 3)
+
+        message = CISCOISE_SUCC_BULK_UPDATE_ENDPOINTS.format(updated=updated, total=len(results))
+
+        if not updated:
+            return action_result.set_status(phantom.APP_ERROR, message)
+
+        return action_result.set_status(phantom.APP_SUCCESS, message)
+
     def _logoff_system(self, param):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -394,7 +1342,7 @@ class CiscoISEConnector(BaseConnector):
         # First try to find the server that we should use
         endpoint = "{0}/{1}".format(MAC_SESSION_DETAILS_REST, mac_address)
 
-        ret_val, ret_data = self._call_rest_api(endpoint, action_result, MAC_SESSION_RESP_SCHEMA)
+        ret_val, ret_data = self._call_rest_api(endpoint, action_result, MAC_SESSION_RESP_SCHEMA, single_flight=True)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
@@ -424,7 +1372,256 @@ class CiscoISEConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_SESSION_TERMINATED)
 
-    def _paginator(self, endpoint, action_result, payload=None, limit=None):
+    def _parse_time(self, action_result, value, key):
+        """ This method parses a time parameter given in ISO 8601 format.
+        :param action_result: object of ActionResult class
+        :param value: time string, e.g. 2022-02-22 10:00:00
+        :param key: name of the parameter
+        :return: status (success/failure), tuple of the naive datetime (None if the parameter is not provided)
+        and whether it was given with an offset
+        """
+
+        if not value:
+            return phantom.APP_SUCCESS, (None, False)
+
+        try:
+            parsed_time = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_TIME.format(param=key)), (None, False)
+
+        # Times with an offset are converted to UTC, times without one are passed to ISE unchanged
+        if parsed_time.tzinfo:
+            return phantom.APP_SUCCESS, (parsed_time.astimezone(timezone.utc).replace(tzinfo=None), True)
+
+        return phantom.APP_SUCCESS, (parsed_time, False)
+
+    def _fetch_authentications(self, endpoint, action_result, mac_filter, user_filter, max_results):
+        """ This method streams the authentications of one time window and keeps the last matching ones.
+        The AuthList reply has the ActiveList session shape and carries no timestamp, so the reply order is kept.
+        :param endpoint: AuthList endpoint of the time window
+        :param action_result: object of ActionResult class
+        :param mac_filter: set of normalized MAC addresses to keep, empty to keep all
+        :param user_filter: set of lower cased user names to keep, empty to keep all
+        :param max_results: maximum number of authentications to keep
+        :return: status (success/failure), dictionary with the kept authentications and the number of matches
+        """
+
+        kept = deque(maxlen=max_results)
+        matched = 0
+
+        def reset():
+            nonlocal matched
+            kept.clear()
+            matched = 0
+
+        def keep(path, item):
+            nonlocal matched
+
+            if not isinstance(item, dict):
+                return True
+
+            if mac_filter and self._normalize_mac(item.get("calling_station_id") or "") not in mac_filter:
+                return True
+
+            if user_filter and (item.get("user_name") or "").lower() not in user_filter:
+                return True
+
+            matched += 1
+            kept.append(item)
+
+            return True
+
+        ret_val, _ = self._call_rest_api(endpoint, action_result, item_callback=keep, item_reset=reset)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        return phantom.APP_SUCCESS, {"authentications": kept, "matched": matched}
+
+    def _list_authentications(self, param):
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        ret_val, max_results = self._validate_integers(
+            action_result, param.get("max_results", DEFAULT_MAX_AUTHENTICATIONS), "max_results"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, window_hours = self._validate_integers(
+            action_result, param.get("window_hours", DEFAULT_AUTH_WINDOW_HOURS), "window_hours"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, (start_time, start_utc) = self._parse_time(action_result, param.get("start_time"), "start_time")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, (end_time, end_utc) = self._parse_time(action_result, param.get("end_time"), "end_time")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Window bounds must all be in the same time zone, the current time is only known in UTC
+        if start_time and end_time and start_utc != end_utc:
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_TIME_OFFSET_MISMATCH)
+
+        if start_time and not end_time:
+            if not start_utc:
+                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_TIME_END_REQUIRED)
+            end_time = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+        if start_time and end_time and start_time >= end_time:
+            return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_TIME_RANGE)
+
+        mac_filter = {self._normalize_mac(mac_address) for mac_address in self._split_list_param(param.get("mac_address"))}
+        user_filter = {user_name.lower() for user_name in self._split_list_param(param.get("user_name"))}
+
+        # Long time ranges are split into windows, from the latest backwards
+        endpoints = list()
+        if start_time:
+            window_start = start_time
+            while window_start < end_time:
+                window_end = min(window_start + timedelta(hours=window_hours), end_time)
+                endpoints.append("{0}/{1}/{2}".format(
+                    AUTH_LIST_REST,
+                    quote(window_start.strftime(AUTH_LIST_TIME_FORMAT)),
+                    quote(window_end.strftime(AUTH_LIST_TIME_FORMAT))
+                ))
+                window_start = window_end
+        elif end_time:
+            endpoints.append("{0}/null/{1}".format(AUTH_LIST_REST, quote(end_time.strftime(AUTH_LIST_TIME_FORMAT))))
+        else:
+            endpoints.append(AUTH_LIST_REST_ENDPOINT)
+
+        endpoints.reverse()
+
+        # Windows are fetched a few at a time and fetching stops once enough authentications are kept,
+        # so memory stays bounded by max_results whatever the length of the range
+        authentications = list()
+        matched = 0
+        windows_fetched = 0
+        for i in range(0, len(endpoints), DEFAULT_MAX_WORKERS):
+            batch = endpoints[i:i + DEFAULT_MAX_WORKERS]
+
+            ret_val, windows = self._run_concurrently(
+                lambda endpoint, window_result: self._fetch_authentications(
+                    endpoint, window_result, mac_filter, user_filter, max_results
+                ),
+                batch,
+                action_result
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            # Replies are taken to list authentications in the order they were recorded, they are reversed to return the latest first
+            for endpoint in batch:
+                authentications.extend(reversed(windows[endpoint]["authentications"]))
+                matched += windows[endpoint]["matched"]
+            del authentications[max_results:]
+            windows_fetched += len(batch)
+
+            if len(authentications) >= max_results:
+                break
+
+        for authentication in authentications:
+            action_result.add_data(authentication)
+
+        summary = action_result.update_summary({})
+        summary["authentications_found"] = matched
+        summary["authentications_returned"] = len(authentications)
+        summary["time_windows"] = windows_fetched
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _call_ers_page(self, endpoint, action_result, payload):
+        """ This method fetches one page of an ERS listing, retrying before giving up on it.
+        :param endpoint: ERS endpoint of the listing
+        :param action_result: object of ActionResult class
+        :param payload: page request payload
+        :return: status (success/failure), page data
+        """
+
+        for attempt in range(PAGE_RETRIES + 1):
+            if attempt:
+                self.debug_print("Retrying page {0} of {1}, attempt {2}".format(payload["page"], endpoint, attempt))
+                time.sleep(PAGE_RETRY_BACKOFF * attempt)
+
+            ret_val, items = self._call_ers_api(endpoint, action_result, data=payload)
+
+            if phantom.is_success(ret_val):
+                return ret_val, items
+
+        return action_result.get_status(), None
+
+    def _open_listing_checkpoint(self, endpoint, page_size):
+        """ This method locks the checkpoint of a listing for the current run.
+        A listing already running in another action keeps its checkpoint, this run then goes without one.
+        :param endpoint: ERS endpoint of the listing
+        :param page_size: page size of the listing
+        :return: path of the checkpoint file, path of the partial output file and the lock file to close
+        at the end of the run, all None if the listing runs without a checkpoint
+        """
+
+        key = hashlib.sha256("{0}|{1}|{2}".format(self.get_asset_id(), endpoint, page_size).encode("utf-8")).hexdigest()
+        directory = os.path.join(self.get_state_dir(), LISTING_CHECKPOINT_DIR)
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            lock_file = open(os.path.join(directory, "{0}.lock".format(key)), "a")
+        except OSError as e:
+            self.debug_print("Unable to open the listing checkpoint: {}".format(e))
+            return None, None, None
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            self.save_progress("Another run of this listing is in progress, continuing without a checkpoint")
+            return None, None, None
+
+        return os.path.join(directory, "{0}.json".format(key)), os.path.join(directory, "{0}.jsonl".format(key)), lock_file
+
+    def _close_listing_checkpoint(self, lock_file, *paths):
+        """ This method removes the given checkpoint files and releases the checkpoint lock.
+        :param lock_file: lock file returned by _open_listing_checkpoint
+        :param paths: checkpoint files to remove
+        """
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        lock_file.close()
+
+    def _load_listing_checkpoint(self, checkpoint_path, output_path):
+        """ This method loads the pages completed by an earlier run of a listing.
+        :param checkpoint_path: path of the checkpoint file
+        :param output_path: path of the partial output file
+        :return: last completed page, list of items fetched so far
+        """
+
+        try:
+            with open(checkpoint_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            with open(output_path) as output_file:
+                items_list = [json.loads(line) for line in output_file]
+        except (OSError, ValueError) as e:
+            self.debug_print("No usable listing checkpoint: {}".format(e))
+            return 0, list()
+
+        # A partial output shorter than the checkpoint does not match it, the listing starts over
+        if len(items_list) < checkpoint["items"]:
+            self.debug_print("Listing checkpoint covers {0} items, only {1} were saved".format(checkpoint["items"], len(items_list)))
+            return 0, list()
+
+        # Items written after the last checkpoint belong to a page which is fetched again
+        return checkpoint["last_page"], items_list[:checkpoint["items"]]
+
+    def _paginator(self, endpoint, action_result, payload=None, limit=None, checkpoint=False, resume=False):
 
         items_list = list()
 
@@ -433,20 +1630,64 @@ class CiscoISEConnector(BaseConnector):
 
         page = 1
         payload["size"] = DEFAULT_MAX_RESULTS
+
+        lock_file = None
+        if checkpoint:
+            checkpoint_path, output_path, lock_file = self._open_listing_checkpoint(endpoint, payload["size"])
+            checkpoint = lock_file is not None
+
+        if checkpoint:
+            if resume:
+                last_page, items_list = self._load_listing_checkpoint(checkpoint_path, output_path)
+                page = last_page + 1
+                if last_page:
+                    self.save_progress("Resuming listing after page {0}, {1} items already fetched".format(last_page, len(items_list)))
+
+            # The partial output is rewritten so it only holds the items covered by the checkpoint.
+            # A run starting over drops the checkpoint of an earlier run first, it no longer matches the output
+            try:
+                if page == 1 and os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                with open(output_path, "w") as output_file:
+                    output_file.writelines("{0}\n".format(json.dumps(item)) for item in items_list)
+            except OSError as e:
+                self.debug_print("Unable to write the listing checkpoint: {}".format(e))
+                self._close_listing_checkpoint(lock_file, checkpoint_path, output_path)
+                checkpoint = False
+
         payload["page"] = page
 
-        while True:
-            ret_val, items = self._call_ers_api(endpoint, action_result, data=payload)
+        while not (limit and len(items_list) >= limit):
+            ret_val, items = self._call_ers_page(endpoint, action_result, payload)
 
             if phantom.is_fail(ret_val):
+                if checkpoint:
+                    # The checkpoint files are kept for a later run with 'resume' enabled
+                    self._close_listing_checkpoint(lock_file)
+                    action_result.append_to_message(CISCOISE_ERR_LISTING_INCOMPLETE.format(page=page))
                 return None
 
-            items_list.extend(items.get("SearchResult", {}).get("resources"))
-
-            if limit and len(items_list) >= limit:
-                return items_list[:limit]
-
-            if len(items.get("SearchResult", {}).get("resources")) < DEFAULT_MAX_RESULTS:
+            resources = items.get("SearchResult", {}).get("resources")
+            items_list.extend(resources)
+
+            if checkpoint:
+                try:
+                    with open(output_path, "a") as output_file:
+                        output_file.writelines("{0}\n".format(json.dumps(item)) for item in resources)
+                    with open(checkpoint_path, "w") as checkpoint_file:
+                        json.dump({
+                            "endpoint": endpoint,
+                            "page_size": payload["size"],
+                            "last_page": page,
+                            "items": len(items_list),
+                            "output_file": output_path
+                        }, checkpoint_file)
+                except OSError as e:
+                    self.debug_print("Unable to write the listing checkpoint: {}".format(e))
+                    self._close_listing_checkpoint(lock_file, checkpoint_path, output_path)
+                    checkpoint = False
+
+            if len(resources) < DEFAULT_MAX_RESULTS:
                 break
 
             if len(items_list) == items.get("SearchResult", {}).get("total"):
@@ -455,6 +1696,12 @@ class CiscoISEConnector(BaseConnector):
             page = page + 1
             payload["page"] = page
 
+        if checkpoint:
+            self._close_listing_checkpoint(lock_file, checkpoint_path, output_path)
+
+        if limit:
+            return items_list[:limit]
+
         return items_list
 
     def _list_resources(self, param):
@@ -468,19 +1715,83 @@ class CiscoISEConnector(BaseConnector):
 
         endpoint = ERS_RESOURCE_REST.format(resource=resource)
 
-        resources = self._paginator(endpoint, action_result, limit=max_result)
+        resources = self._paginator(endpoint, action_result, limit=max_result, checkpoint=True, resume=param.get("resume", False))
 
         if resources is None:
             return action_result.get_status()
 
+        fields = self._split_list_param(param.get("fields"))
+        compact = param.get("compact", False)
+
         for resource in resources:
-            action_result.add_data(resource)
+            action_result.add_data(self._compact_record(resource, fields, compact))
 
         summary = action_result.update_summary({})
         summary["resources_returned"] = action_result.get_data_size()
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _search_resources(self, resource_endpoint, key, values, action_result):
+        """ This method finds the ERS resources whose key equals one of the values using OR-filtered queries.
+        :param resource_endpoint: ERS endpoint of the resource type
+        :param key: field to filter on
+        :param values: list of unique values
+        :param action_result: object of ActionResult class
+        :return: status (success/failure), dictionary of value to list of matching resources, in input order
+        """
+
+        found = {filter_value: [] for filter_value in values}
+
+        batches = dict()
+        for i in range(0, len(values), ERS_FILTER_BATCH_SIZE):
+            batch = values[i:i + ERS_FILTER_BATCH_SIZE]
+            filters = "&".join("filter={0}.EQ.{1}".format(key, filter_value) for filter_value in batch)
+            if len(batch) > 1:
+                filters = "{0}&{1}".format(filters, ERS_FILTER_OR)
+            batches["{0}?{1}".format(resource_endpoint, filters)] = batch
+
+        def paginate(endpoint, endpoint_result):
+            resources = self._paginator(endpoint, endpoint_result)
+            return endpoint_result.get_status() if resources is None else phantom.APP_SUCCESS, resources
+
+        ret_val, responses = self._run_concurrently(paginate, batches, action_result)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        unmatched = dict()
+        for endpoint, batch in batches.items():
+            if len(batch) == 1:
+                found[batch[0]].extend(responses[endpoint])
+                continue
+
+            batch_values = {filter_value.lower(): filter_value for filter_value in batch}
+            ambiguous = False
+            for resource in responses[endpoint]:
+                filter_value = batch_values.get(str(resource.get(key, "")).lower())
+                if filter_value is None:
+                    ambiguous = True
+                else:
+                    found[filter_value].append(resource)
+
+            if ambiguous:
+                unmatched.update(
+                    ("{0}?filter={1}.EQ.{2}".format(resource_endpoint, key, filter_value), filter_value)
+                    for filter_value in batch if not found[filter_value]
+                )
+
+        # Search results only hold the id, name and description of a resource, a batch filtered on another
+        # key cannot be matched back to its values, which are then looked up one by one
+        ret_val, responses = self._run_concurrently(paginate, unmatched, action_result)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        for endpoint, filter_value in unmatched.items():
+            found[filter_value].extend(responses[endpoint])
+
+        return phantom.APP_SUCCESS, found
+
     def _get_resources(self, param):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -489,6 +1800,8 @@ class CiscoISEConnector(BaseConnector):
         resource_id = param.get("resource_id")
         key = param.get("key")
         value = param.get("value")
+        fields = self._split_list_param(param.get("fields"))
+        compact = param.get("compact", False)
 
         if not resource_id and not key:
             return action_result.set_status(
@@ -498,19 +1811,25 @@ class CiscoISEConnector(BaseConnector):
         elif key and not value:
             return action_result.set_status(phantom.APP_ERROR, "Please enter value for the key")
         if not resource_id and (key and value):
-            resource_filter = "filter={0}.EQ.{1}".format(key, value)
-            endpoint = "{0}?{1}".format(ERS_RESOURCE_REST.format(resource=resource), resource_filter)
+            # Values may contain commas, they are only split when asked to
+            values = self._split_list_param(value) if param.get("multiple_values", False) else [value]
 
-            resources = self._paginator(endpoint, action_result)
+            ret_val, found = self._search_resources(ERS_RESOURCE_REST.format(resource=resource), key, values, action_result)
 
-            if resources is None:
+            if phantom.is_fail(ret_val):
                 return action_result.get_status()
 
-            for resource in resources:
-                action_result.add_data(resource)
+            resources_returned = 0
+            for filter_value, resources in found.items():
+                for resource in resources:
+                    resource = self._compact_record(resource, fields, compact)
+                    resource["filter_value"] = filter_value
+                    action_result.add_data(resource)
+                    resources_returned += 1
 
             summary = action_result.update_summary({})
-            summary["resources_returned"] = len(resources)
+            summary["resources_returned"] = resources_returned
+            summary["values_not_found"] = [filter_value for filter_value, resources in found.items() if not resources]
 
             return action_result.set_status(phantom.APP_SUCCESS)
 
@@ -523,7 +1842,7 @@ class CiscoISEConnector(BaseConnector):
         summary = action_result.update_summary({})
         summary["resource_id"] = resource_id
 
-        action_result.add_data(resp.get(MAP_RESOURCE[param["resource"]][1]))
+        action_result.add_data(self._compact_record(resp.get(MAP_RESOURCE[param["resource"]][1]), fields, compact))
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
@@ -560,6 +1879,57 @@ class CiscoISEConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, "Resource created successfully")
 
+    def _values_equal(self, current_value, new_value):
+
+        if current_value == new_value:
+            return True
+
+        # Values given as action parameters are strings, ERS returns booleans and numbers as JSON types
+        if isinstance(new_value, str) and isinstance(current_value, (bool, int, float)):
+            return str(current_value).lower() == new_value.lower()
+
+        return False
+
+    def _merge_value(self, current_value, new_value):
+        """ This method merges a new value into the current one, nested dictionaries are merged key by key.
+        :return: merged value
+        """
+
+        if not (isinstance(current_value, dict) and isinstance(new_value, dict)):
+            return new_value
+
+        merged = dict(current_value)
+        for key, value in new_value.items():
+            merged[key] = self._merge_value(current_value.get(key), value)
+
+        return merged
+
+    def _diff_resource(self, current, fields):
+        """ This method compares the requested field values with the current resource.
+        :param current: current resource dictionary
+        :param fields: dictionary of field to requested value
+        :return: dictionary of changed field to merged value, list of per-field comparison records
+        """
+
+        changes = dict()
+        comparison = list()
+
+        for field, value in fields.items():
+            current_value = current.get(field)
+            new_value = self._merge_value(current_value, value)
+
+            if isinstance(new_value, dict):
+                changed = new_value != current_value
+            else:
+                changed = not self._values_equal(current_value, new_value)
+
+            if changed:
+                changes[field] = new_value
+
+            comparison.append({"field": field, "old_value": current_value, "new_value": new_value, "changed": changed})
+
+        return changes, comparison
+
     def _update_resource(self, param):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -567,15 +1937,53 @@ class CiscoISEConnector(BaseConnector):
         resource = MAP_RESOURCE[param["resource"]][0]
         resource_key = MAP_RESOURCE[param["resource"]][1]
         resource_id = param["resource_id"]
-        key = param["key"]
-        value = param["value"]
+        key = param.get("key")
+        value = param.get("value")
+        dry_run = param.get("dry_run", False)
+
+        fields = dict()
+        if param.get("fields_json"):
+            try:
+                fields = json.loads(param["fields_json"])
+            except Exception as ex:  # noqa: F841
+                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_JSON.format(param="fields_json"))
+
+            if not isinstance(fields, dict):
+                return action_result.set_status(phantom.APP_ERROR, CISCOISE_ERR_INVALID_JSON.format(param="fields_json"))
+
+        if (key is not None) ^ (value is not None):
+            return action_result.set_status(phantom.APP_ERROR, "Please specify both key and value")
+        elif key is not None:
+            fields[key] = value
+
+        if not fields:
+            return action_result.set_status(phantom.APP_ERROR, "Please specify 'fields_json' or 'key' and 'value'")
 
         endpoint = "{0}/{1}".format(ERS_RESOURCE_REST.format(resource=resource), resource_id)
 
-        data_dict = {resource_key: {}}
-        data_dict[resource_key][key] = value
+        # The shared cross-action store may lag behind writes made by other actions, so it is not used for the diff
+        ret_val, resp = self._call_ers_api(endpoint, action_result, single_flight=False)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        changes, comparison = self._diff_resource((resp or {}).get(resource_key) or {}, fields)
+
+        for field_comparison in comparison:
+            action_result.add_data(field_comparison)
+
+        summary = action_result.update_summary({})
+        summary["changed_fields"] = len(changes)
+        summary["unchanged_fields"] = len(comparison) - len(changes)
+        summary["dry_run"] = dry_run
+
+        if not changes:
+            return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_RESOURCE_UNCHANGED)
+
+        if dry_run:
+            return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_RESOURCE_DRY_RUN.format(len(changes)))
+
         ret_val, resp = self._call_ers_api(
-            endpoint, action_result, data=data_dict, method="put"
+            endpoint, action_result, data={resource_key: changes}, method="put"
         )
         if phantom.is_fail(ret_val):
             return action_result.get_status()
@@ -698,44 +2106,131 @@ class CiscoISEConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, 'Policy created')
 
-    def _test_connectivity_to_device(self, base_url, verify=True):
+    def _measure_tls_handshake(self, host, port, verify):
+
+        context = ssl.create_default_context(cafile=requests.certs.where())
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+        with socket.create_connection((host, port), timeout=CONNECTIVITY_TIMEOUT) as sock:
+            start_time = time.monotonic()
+            with context.wrap_socket(sock, server_hostname=host):
+                return round((time.monotonic() - start_time) * 1000, 1)
+
+    def _probe_node(self, base_url, api, verify):
+        """ This method checks one API of a node, measuring the TLS handshake and the API latency.
+        The latency is measured on a second request over the connection opened by the first one,
+        so it does not include connection setup.
+        :param base_url: base URL of the node
+        :param api: API to probe, either 'mnt' or 'ers'
+        :param verify: whether to verify the server certificate
+        :return: dictionary describing the probe
+        """
+
+        if api == "mnt":
+            url = "{0}{1}".format(base_url, ACTIVE_LIST_REST)
+            auth = self._auth
+            headers = None
+        else:
+            url = "{0}{1}?size=1".format(base_url, ERS_ENDPOINT_REST)
+            auth = self._ers_auth or self._auth
+            headers = {"ACCEPT": "application/json"}
+
+        parsed_url = urlparse(url)
+        probe = {"node": base_url, "api": api, "status": "failed", "tls_handshake_ms": None, "api_latency_ms": None}
+
         try:
-            rest_endpoint = "{0}{1}".format(base_url, ACTIVE_LIST_REST)
-            self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, base_url)
-            resp = requests.get(  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
-                rest_endpoint,
-                auth=self._auth,
-                verify=verify)
+            probe["tls_handshake_ms"] = self._measure_tls_handshake(parsed_url.hostname, parsed_url.port or 443, verify)
         except Exception as e:
-            self.debug_print("Exception is test connectivity: {}".format(e))
-            return self.set_status_save_progress(phantom.APP_ERROR, CISCOISE_ERR_TEST_CONNECTIVITY_FAILED)
+            self.debug_print("Exception in TLS handshake: {}".format(e))
+            probe["message"] = "{0}: {1}".format(CISCOISE_ERR_TLS_HANDSHAKE, e)
+            return probe
 
-        if resp.status_code == 200:
-            return self.set_status_save_progress(phantom.APP_SUCCESS, CISCOISE_SUCC_TEST_CONNECTIVITY_PASSED)
-        else:
-            return self.set_status_save_progress(
-                phantom.APP_ERROR,
-                CISCOISE_ERR_TEST_CONNECTIVITY_FAILED_ERR_CODE,
-                code=resp.status_code
-            )
+        with requests.Session() as session:
+            try:
+                resp = session.get(url, auth=auth, verify=verify, headers=headers, timeout=CONNECTIVITY_TIMEOUT)
+                if resp.status_code != 200:
+                    probe["message"] = CISCOISE_ERR_TEST_CONNECTIVITY_FAILED_ERR_CODE.format(code=resp.status_code)
+                    return probe
+
+                start_time = time.monotonic()
+                resp = session.get(url, auth=auth, verify=verify, headers=headers, timeout=CONNECTIVITY_TIMEOUT)
+            except Exception as e:
+                self.debug_print("Exception is test connectivity: {}".format(e))
+                probe["message"] = "{0}: {1}".format(CISCOISE_ERR_TEST_CONNECTIVITY_FAILED, e)
+                return probe
+
+        probe["api_latency_ms"] = round((time.monotonic() - start_time) * 1000, 1)
+
+        if resp.status_code != 200:
+            probe["message"] = CISCOISE_ERR_TEST_CONNECTIVITY_FAILED_ERR_CODE.format(code=resp.status_code)
+            return probe
+
+        probe["status"] = "success"
+        probe["message"] = CISCOISE_SUCC_TEST_CONNECTIVITY_PASSED
+
+        return probe
 
     def _test_connectivity(self, param):
 
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
         config = self.get_config()
         verify = config[phantom.APP_JSON_VERIFY]
-        self.save_progress("Connecting to first device")
-        result = self._test_connectivity_to_device(self._base_url, verify)
 
+        nodes = [self._base_url]
         if self._ha_device:
-            self.save_progress("Connecting to second device")
-            result = self._test_connectivity_to_device(self._ha_device_url, verify)
+            nodes.append(self._ha_device_url)
 
-        return result
+        self.save_progress("Probing MnT and ERS APIs on {0} node(s)".format(len(nodes)))
+
+        probe_apis = ("mnt", "ers")
+        with ThreadPoolExecutor(max_workers=len(nodes) * len(probe_apis)) as executor:
+            futures = [executor.submit(self._probe_node, node, api, verify) for node in nodes for api in probe_apis]
+
+        node_health = {node: {"healthy": True} for node in nodes}
+
+        for future in futures:
+            probe = future.result()
+            action_result.add_data(probe)
+            self.save_progress(CISCOISE_NODE_PROBE_ROW.format(**probe))
+
+            node_health[probe["node"]][probe["api"]] = {
+                key: probe[key] for key in ("status", "tls_handshake_ms", "api_latency_ms")
+            }
+
+            # ERS is only required when ERS credentials are configured, otherwise its failure is only reported
+            if probe["status"] != "success" and (probe["api"] == "mnt" or self._ers_auth):
+                node_health[probe["node"]]["healthy"] = False
+
+        try:
+            with open(self._node_health_path(), "w") as health_file:
+                json.dump({"time": time.time(), "nodes": node_health}, health_file)
+        except OSError as e:
+            self.debug_print("Unable to save the node health: {}".format(e))
+
+        unhealthy_nodes = [node for node in nodes if not node_health[node]["healthy"]]
+
+        summary = action_result.update_summary({})
+        summary["nodes_probed"] = len(nodes)
+        summary["nodes_healthy"] = len(nodes) - len(unhealthy_nodes)
+
+        if unhealthy_nodes:
+            self.save_progress(CISCOISE_ERR_TEST_CONNECTIVITY_FAILED)
+            return action_result.set_status(
+                phantom.APP_ERROR, CISCOISE_ERR_TEST_CONNECTIVITY_NODES.format(nodes=", ".join(unhealthy_nodes))
+            )
+
+        self.save_progress(CISCOISE_SUCC_TEST_CONNECTIVITY_PASSED)
+        return action_result.set_status(phantom.APP_SUCCESS, CISCOISE_SUCC_TEST_CONNECTIVITY_PASSED)
 
     def handle_action(self, param):
 
         result = None
         action = self.get_action_identifier()
+        action_results_count = len(self.get_action_results())
+        self._queue_wait = 0
 
         if action == phantom.ACTION_ID_TEST_ASSET_CONNECTIVITY:
             result = self._test_connectivity(param)
@@ -745,12 +2240,16 @@ class CiscoISEConnector(BaseConnector):
             result = self._terminate_session(param)
         elif action == self.ACTION_ID_LOGOFF_SYSTEM:
             result = self._logoff_system(param)
+        elif action == self.ACTION_ID_LIST_AUTHENTICATIONS:
+            result = self._list_authentications(param)
         elif action == self.ACTION_ID_LIST_ENDPOINTS:
             result = self._list_endpoints(param)
         elif action == self.ACTION_ID_GET_ENDPOINT:
             result = self._get_endpoint(param)
         elif action == self.ACTION_ID_UPDATE_ENDPOINT:
             result = self._update_endpoint(param)
+        elif action == self.ACTION_ID_BULK_UPDATE_ENDPOINTS:
+            result = self._bulk_update_endpoints(param)
         elif action == self.ACTION_ID_LIST_RESOURCES:
             result = self._list_resources(param)
         elif action == self.ACTION_ID_GET_RESOURCES:
@@ -772,6 +2271,10 @@ class CiscoISEConnector(BaseConnector):
         elif action == self.ACTION_ID_DELETE_POLICY:
             result = self._delete_policy(param)
 
+        if self._governor_rate or any(self._governor_limits.values()):
+            for action_result in self.get_action_results()[action_results_count:]:
+                action_result.update_summary({"queue_wait_seconds": round(self._queue_wait, 3)})
+
         return result
 
 
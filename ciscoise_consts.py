@@ -18,10 +18,13 @@
 CISCOISE_JSON_SERVER = "server"
 CISCOISE_JSON_MACADDR = "mac_address"
 CISCOISE_JSON_TOTAL_SESSIONS = "sessions_found"
+CISCOISE_JSON_IS_QUARANTINED = "is_quarantined"
 
 # REST endpoint Consts
 ACTIVE_LIST_REST = "/admin/API/mnt/Session/ActiveList"
 AUTH_LIST_REST_ENDPOINT = "/ise/mnt/Session/AuthList/null/null"
+AUTH_LIST_REST = "/ise/mnt/Session/AuthList"
+AUTH_LIST_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 DISCONNECT_MAC_REST = "/ise/mnt/CoA/Disconnect"
 REAUTH_MAC_REST = "/ise/mnt/CoA/Reauth"
 IS_MAC_QUARANTINED_REST = "/ise/eps/isQuarantineByMAC"
@@ -31,11 +34,15 @@ ERS_RESOURCE_REST = ":9060/ers/config/{resource}"
 ERS_ENDPOINT_ANC_APPLY = ":9060/ers/config/ancendpoint/apply"
 ERS_ENDPOINT_ANC_CLEAR = ":9060/ers/config/ancendpoint/clear"
 ERS_POLICIES = ":9060/ers/config/ancpolicy"
+ERS_FILTER_OR = "filterType=or"
 
 # Error/Success
 CISCOISE_ERR_TEST_CONNECTIVITY_FAILED = "Test connectivity failed"
 CISCOISE_ERR_TEST_CONNECTIVITY_FAILED_ERR_CODE = "Test connectivity failed with status code: '{code}'"
 CISCOISE_SUCC_TEST_CONNECTIVITY_PASSED = "Test connectivity passed"
+CISCOISE_ERR_TEST_CONNECTIVITY_NODES = "Test connectivity failed for node(s): {nodes}"
+CISCOISE_ERR_TLS_HANDSHAKE = "TLS handshake failed"
+CISCOISE_NODE_PROBE_ROW = "{node} {api}: {status}, TLS handshake: {tls_handshake_ms} ms, API latency: {api_latency_ms} ms, {message}"
 CISCOISE_ERR_REST_API = "REST Api error"
 CISCOISE_ERR_REST_API_ERR_CODE = "REST Api error with status code: {code}, Message from server: {message}"
 CISCOISE_ERR_UNABLE_TO_PARSE_REPLY = "Parsing error, Unable to convert xml reply to json"
@@ -51,7 +58,41 @@ CISCOISE_SUCC_UPDATE_ENDPOINT = "Endpoint updated"
 CISCOISE_ERR_INVALID_PARAM = "Please provide a non-zero positive integer in {param}"
 CISCOISE_MAP_IP_ABSENT_ERROR = "Please provide either mac address or ip address"
 CISCOISE_ERS_CRED_MISSING = "ERS credentials in asset configuration are required for this action"
+CISCOISE_ERR_INVALID_JSON = "Please provide a valid JSON in {param}"
+CISCOISE_ERR_BULK_ROWS = "Please provide a non-empty list of endpoint rows in 'endpoints_json'"
+CISCOISE_ERR_BULK_ROW_ID = "Row does not contain a non-empty string 'endpoint_id' or 'mac_address'"
+CISCOISE_ERR_BULK_ROW_ATTRIBUTES = "Row does not contain 'attributes' or 'custom_attributes'"
+CISCOISE_ERR_BULK_ROW_INVALID = "Row is not a valid JSON object"
+CISCOISE_ERR_MAC_NOT_FOUND = "No endpoint found for the MAC address"
+CISCOISE_ERR_INVALID_TIME = "Please provide a valid ISO 8601 time, e.g. 2022-02-22 10:00:00, in {param}"
+CISCOISE_ERR_INVALID_TIME_RANGE = "Please provide a 'start_time' earlier than 'end_time'"
+CISCOISE_ERR_TIME_OFFSET_MISMATCH = "Please provide 'start_time' and 'end_time' either both with or both without an offset"
+CISCOISE_ERR_TIME_END_REQUIRED = "Please provide 'end_time', or an offset in 'start_time' to end the range at the current time"
+CISCOISE_ERR_LISTING_INCOMPLETE = ". Listing stopped at page {page}, rerun the action with 'resume' enabled to continue from there"
+CISCOISE_SUCC_RESOURCE_UNCHANGED = "Resource already up to date, no update sent"
+CISCOISE_SUCC_RESOURCE_DRY_RUN = "Dry run, {0} fields would be updated"
+CISCOISE_SUCC_BULK_UPDATE_ENDPOINTS = "{updated} of {total} rows updated"
 DEFAULT_MAX_RESULTS = 7
+ERS_MAX_PAGE_SIZE = 100
+ERS_FILTER_BATCH_SIZE = 50
+DEFAULT_MAX_WORKERS = 5
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10
+DEFAULT_SINGLE_FLIGHT_TTL = 5
+SINGLE_FLIGHT_DIR = "single_flight"
+SINGLE_FLIGHT_PURGE_AGE = 300
+SINGLE_FLIGHT_GENERATION_FILE = "generation"
+DEFAULT_MAX_CONCURRENCY = 5
+DEFAULT_MAX_AUTHENTICATIONS = 1000
+DEFAULT_AUTH_WINDOW_HOURS = 6
+PAGE_RETRIES = 2
+PAGE_RETRY_BACKOFF = 2
+LISTING_CHECKPOINT_DIR = "listings"
+CONNECTIVITY_TIMEOUT = 30
+NODE_HEALTH_FILE = "node_health.json"
+NODE_HEALTH_MAX_AGE = 3600
+SESSION_DETAIL_GROUP_FIELDS = ("authentication_method", "authentication_protocol")
+GOVERNOR_DIR = "governor"
+GOVERNOR_POLL_INTERVAL = 0.05
 
 # Json reply schema
 IS_MAC_QUARAN_RESP_SCHEMA = {